@@ -1,7 +1,7 @@
 """
 Alert Service for managing price alerts and notifications.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from uuid import UUID
 from sqlalchemy.orm import Session
@@ -55,6 +55,42 @@ class AlertService:
         
         return alert
     
+    def create_price_alerts_bulk(
+        self,
+        user_id: UUID,
+        ticker: str,
+        specs: List[Tuple[str, float, List[str]]]
+    ) -> List[PriceAlert]:
+        """
+        Create several price alerts for one ticker in a single commit.
+        
+        IDs are generated client-side, so the session flushes all of the rows
+        as one batched INSERT.
+        
+        Args:
+            user_id: UUID of the user
+            ticker: Stock ticker symbol
+            specs: List of (condition, target_price, notification_channels) tuples
+            
+        Returns:
+            List of created PriceAlert objects, in the order of specs
+        """
+        alerts = [
+            PriceAlert(
+                user_id=user_id,
+                ticker=ticker.upper(),
+                condition=condition,
+                target_price=target_price,
+                notification_channels=notification_channels,
+                is_active=True
+            )
+            for condition, target_price, notification_channels in specs
+        ]
+        self.db.add_all(alerts)
+        self.db.commit()
+        
+        return alerts
+    
     def get_user_alerts(self, user_id: UUID) -> List[PriceAlert]:
         """
         Get all alerts for a user.
@@ -171,7 +207,8 @@ class AlertService:
             current_price: Current stock price
             
         Returns:
-            Dictionary with trigger details
+            Dictionary with trigger details, including the ID of the created
+            notification (None if the notification was suppressed)
         """
         # Mark alert as triggered
         alert.triggered_at = datetime.utcnow()
@@ -185,6 +222,7 @@ class AlertService:
             time_window_minutes=15
         )
         
+        notification_id = None
         if should_send:
             # Create notification with multiple channels
             title = f"Price Alert: {alert.ticker}"
@@ -201,7 +239,7 @@ class AlertService:
                 "triggered_at": alert.triggered_at.isoformat()
             }
             
-            self.send_notification(
+            notification = self.send_notification(
                 user_id=alert.user_id,
                 notification_type="price_alert",
                 title=title,
@@ -209,6 +247,7 @@ class AlertService:
                 data=data,
                 channels=alert.notification_channels
             )
+            notification_id = str(notification.id)
         else:
             logger.info(
                 f"Alert {alert.id} triggered but notification suppressed due to grouping rules"
@@ -222,7 +261,8 @@ class AlertService:
             "current_price": current_price,
             "triggered_at": alert.triggered_at.isoformat(),
             "notification_channels": alert.notification_channels,
-            "notification_sent": should_send
+            "notification_sent": should_send,
+            "notification_id": notification_id
         }
     
     def send_notification(
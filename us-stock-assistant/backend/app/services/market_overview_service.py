@@ -149,9 +149,9 @@ class MarketOverviewService:
             if isinstance(results[2], Exception):
                 logger.warning(f"Failed to get trending tickers, continuing without: {results[2]}")
             
-            # Annotate each article with its individual sentiment
-            for article in headlines:
-                article.sentiment = self.sentiment_analyzer.analyzeSentiment(article)
+            # Annotate each article with its individual sentiment, scored as one batch
+            for article, sentiment in zip(headlines, self.sentiment_analyzer.analyzeSentimentBatch(headlines)):
+                article.sentiment = sentiment
             
             # Calculate overall market sentiment from headlines with indices alignment
             sentiment = self._calculate_market_sentiment(headlines, indices)
@@ -5,7 +5,6 @@ This service provides caching, deduplication, and batch retrieval for news artic
 """
 import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime
 import json
@@ -134,16 +133,17 @@ class NewsService:
             # Apply limit after deduplication
             limited_articles = deduplicated_articles[:limit]
             
-            # Analyze sentiment for each article in parallel
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                for article in limited_articles:
-                    if not article.sentiment:
-                        article.sentiment = await loop.run_in_executor(
-                            executor,
-                            self.sentiment_analyzer.analyzeSentiment,
-                            article
-                        )
+            # Analyze sentiment for unscored articles as one batch, off the event loop
+            unscored = [article for article in limited_articles if not article.sentiment]
+            if unscored:
+                loop = asyncio.get_event_loop()
+                sentiments = await loop.run_in_executor(
+                    None,
+                    self.sentiment_analyzer.analyzeSentimentBatch,
+                    unscored
+                )
+                for article, sentiment in zip(unscored, sentiments):
+                    article.sentiment = sentiment
             
             # Cache the result
             try:
@@ -10,6 +10,7 @@ import uuid
 
 from app.models import Portfolio, StockPosition, User
 from app.audit import log_portfolio_action, log_position_action
+from app.validators import validate_ticker
 
 
 class PortfolioService:
@@ -109,9 +110,12 @@ class PortfolioService:
             Created StockPosition object
             
         Raises:
-            ValueError: If portfolio doesn't exist
+            ValueError: If ticker format is invalid or portfolio doesn't exist
             SQLAlchemyError: If database operation fails
         """
+        # Reject malformed tickers before touching the database
+        ticker = validate_ticker(ticker)
+        
         try:
             # Get or create portfolio
             portfolio = self.get_portfolio(user_id)
@@ -4,9 +4,11 @@ Sentiment Analyzer for news articles using FinBERT.
 This service provides sentiment analysis for financial news articles
 using ProsusAI/finbert, a BERT model fine-tuned on financial text.
 """
+import bisect
 import logging
+import re
 import threading
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel
 
 from app.mcp.tools.news import NewsArticle
@@ -19,6 +21,20 @@ _model_lock = threading.Lock()
 _model_loaded = False
 _model_load_failed = False
 
+# Scores keyed by article text. Routers build a new analyzer per request, so the
+# cache is module-level; the same articles recur across news, sentiment and
+# overview requests. Oldest entries are evicted first once it is full.
+_SCORE_CACHE_MAXSIZE = 8192
+_score_cache: Dict[str, tuple[str, float, float]] = {}
+_score_cache_lock = threading.Lock()
+
+# Joins texts for batched keyword scoring. It is not a word character, so a
+# whole-word keyword match can never span two texts.
+_RECORD_SEPARATOR = "\x1e"
+
+# Texts per FinBERT forward pass
+_FINBERT_BATCH_SIZE = 16
+
 
 def _load_finbert():
     """Load FinBERT model lazily on first use (thread-safe)."""
@@ -78,46 +94,74 @@ class SentimentAnalyzer:
         "layoff", "layoffs", "lawsuit", "investigation"
     ]
 
+    # Each lexicon as one whole-word alternation, so a text is scanned once per lexicon
+    _POSITIVE_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, POSITIVE_KEYWORDS)) + r')\b')
+    _NEGATIVE_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, NEGATIVE_KEYWORDS)) + r')\b')
+
     def __init__(self):
         """Initialize Sentiment Analyzer and begin loading FinBERT in background."""
         _load_finbert()
 
-    def _finbert_score(self, text: str) -> tuple[str, float, float]:
-        """Run FinBERT inference on text. Returns (label, score, confidence)."""
+    def _finbert_score_batch(self, texts: List[str]) -> List[tuple[str, float, float]]:
+        """Run FinBERT inference on several texts in padded forward passes of bounded size."""
         import torch
-        # Truncate to 512 tokens max
-        inputs = _tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            max_length=512,
-            padding=True
-        )
-        with torch.no_grad():
-            outputs = _model(**inputs)
-        probs = torch.softmax(outputs.logits, dim=-1)[0]
         # FinBERT label order: positive=0, negative=1, neutral=2
         label_map = {0: "positive", 1: "negative", 2: "neutral"}
-        idx = int(probs.argmax())
-        label = label_map[idx]
-        confidence = float(probs[idx])
-        pos_prob = float(probs[0])
-        neg_prob = float(probs[1])
-        score = pos_prob - neg_prob  # -1 to 1
-        return label, score, confidence
+        results = []
+        # Score in fixed-size sub-batches so memory is bounded by the batch size,
+        # not by the largest article list a request sends
+        for start in range(0, len(texts), _FINBERT_BATCH_SIZE):
+            # Truncate to 512 tokens max
+            inputs = _tokenizer(
+                texts[start:start + _FINBERT_BATCH_SIZE],
+                return_tensors="pt",
+                truncation=True,
+                max_length=512,
+                padding=True
+            )
+            with torch.no_grad():
+                outputs = _model(**inputs)
+            for probs in torch.softmax(outputs.logits, dim=-1):
+                idx = int(probs.argmax())
+                label = label_map[idx]
+                confidence = float(probs[idx])
+                pos_prob = float(probs[0])
+                neg_prob = float(probs[1])
+                score = pos_prob - neg_prob  # -1 to 1
+                results.append((label, score, confidence))
+        return results
 
     def _keyword_score(self, text: str) -> tuple[str, float, float]:
         """Fallback keyword-based scoring."""
-        import re
         text_lower = text.lower()
-        positive_count = sum(
-            1 for kw in self.POSITIVE_KEYWORDS
-            if re.search(r'\b' + re.escape(kw) + r'\b', text_lower)
-        )
-        negative_count = sum(
-            1 for kw in self.NEGATIVE_KEYWORDS
-            if re.search(r'\b' + re.escape(kw) + r'\b', text_lower)
-        )
+        # Count distinct keywords present, not repeated occurrences
+        positive_count = len(set(self._POSITIVE_RE.findall(text_lower)))
+        negative_count = len(set(self._NEGATIVE_RE.findall(text_lower)))
+        return self._keyword_label(positive_count, negative_count)
+
+    def _keyword_scores(self, texts: List[str]) -> List[tuple[str, float, float]]:
+        """Keyword-score several texts with one lowercase pass and one scan per lexicon."""
+        buffer = _RECORD_SEPARATOR.join(texts).lower()
+        if buffer.count(_RECORD_SEPARATOR) != len(texts) - 1:
+            # A text contains the separator itself, so offsets would be ambiguous
+            return [self._keyword_score(text) for text in texts]
+        separators = []
+        index = buffer.find(_RECORD_SEPARATOR)
+        while index != -1:
+            separators.append(index)
+            index = buffer.find(_RECORD_SEPARATOR, index + 1)
+        positive = [set() for _ in texts]
+        negative = [set() for _ in texts]
+        for pattern, found in ((self._POSITIVE_RE, positive), (self._NEGATIVE_RE, negative)):
+            for match in pattern.finditer(buffer):
+                found[bisect.bisect(separators, match.start())].add(match.group())
+        return [
+            self._keyword_label(len(positive_found), len(negative_found))
+            for positive_found, negative_found in zip(positive, negative)
+        ]
+
+    def _keyword_label(self, positive_count: int, negative_count: int) -> tuple[str, float, float]:
+        """Turn distinct keyword counts into a label, score and confidence."""
         total = positive_count + negative_count
         if total == 0:
             return "neutral", 0.0, 0.5
@@ -130,12 +174,41 @@ class SentimentAnalyzer:
         return "neutral", 0.0, 0.6
 
     def _calculate_sentiment_score(self, text: str) -> tuple[str, float, float]:
+        return self._calculate_sentiment_scores([text])[0]
+
+    def _calculate_sentiment_scores(self, texts: List[str]) -> List[tuple[str, float, float]]:
+        """Score texts, reusing cached results and scoring only the misses."""
+        scores = {}
+        with _score_cache_lock:
+            for text in texts:
+                if text in _score_cache:
+                    scores[text] = _score_cache[text]
+        misses = [text for text in dict.fromkeys(texts) if text not in scores]
+        if misses:
+            new_scores, cacheable = self._score_texts(misses)
+            scores.update(zip(misses, new_scores))
+            if cacheable:
+                with _score_cache_lock:
+                    for text, result in zip(misses, new_scores):
+                        if len(_score_cache) >= _SCORE_CACHE_MAXSIZE:
+                            del _score_cache[next(iter(_score_cache))]
+                        _score_cache[text] = result
+        return [scores[text] for text in texts]
+
+    def _score_texts(self, texts: List[str]) -> tuple[List[tuple[str, float, float]], bool]:
+        """Score texts and report whether the scores may be cached.
+
+        Keyword scores that stand in for a FinBERT failure are not cached, so the
+        texts are rescored by the model next time. They are only cached once the
+        model has failed to load, when keywords are the only backend.
+        """
         if _model_loaded and not _model_load_failed:
             try:
-                return self._finbert_score(text)
+                return self._finbert_score_batch(texts), True
             except Exception as e:
-                logger.warning(f"FinBERT inference failed, using keyword fallback: {e}")
-        return self._keyword_score(text)
+                logger.warning(f"FinBERT batch inference failed, using keyword fallback: {e}")
+                return self._keyword_scores(texts), False
+        return self._keyword_scores(texts), _model_load_failed
 
     def analyzeSentiment(self, article: NewsArticle) -> SentimentScore:
         text = f"{article.headline} {article.summary}"
@@ -143,6 +216,16 @@ class SentimentAnalyzer:
         logger.debug(f"Sentiment '{article.headline[:60]}': {label} score={score:.2f} conf={confidence:.2f}")
         return SentimentScore(label=label, score=score, confidence=confidence)
 
+    def analyzeSentimentBatch(self, articles: List[NewsArticle]) -> List[SentimentScore]:
+        """Score several articles at once, running FinBERT as a single batch."""
+        if not articles:
+            return []
+        texts = [f"{article.headline} {article.summary}" for article in articles]
+        return [
+            SentimentScore(label=label, score=score, confidence=confidence)
+            for label, score, confidence in self._calculate_sentiment_scores(texts)
+        ]
+
     def getStockSentiment(
         self,
         ticker: str,
@@ -156,7 +239,7 @@ class SentimentAnalyzer:
                 recent_articles=[]
             )
 
-        sentiments = [self.analyzeSentiment(a) for a in articles]
+        sentiments = self.analyzeSentimentBatch(articles)
 
         total_weighted_score = sum(s.score * s.confidence for s in sentiments)
         total_confidence = sum(s.confidence for s in sentiments)
@@ -8,6 +8,22 @@ from typing import Optional
 import html
 
 
+# Patterns are compiled once at import; validators run on every request
+_TICKER_RE = re.compile(r'^[A-Za-z]{1,10}(\.[A-Za-z]{1,2})?$')
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_UPPERCASE_RE = re.compile(r'[A-Z]')
+_LOWERCASE_RE = re.compile(r'[a-z]')
+_DIGIT_RE = re.compile(r'\d')
+# SQL keywords, comment/statement separators, and tautologies such as OR 1=1,
+# combined so a query is scanned once
+_SQL_INJECTION_RE = re.compile(
+    r"\b(?:UNION|SELECT|INSERT|UPDATE|DELETE|DROP)\b"
+    r"|--|;|/\*|\*/"
+    r"|\b(?:OR|AND)\b\s+\d+\s*=\s*\d+",
+    re.IGNORECASE,
+)
+
+
 def validate_ticker(ticker: str) -> str:
     """
     Validate ticker symbol format.
@@ -28,7 +44,7 @@ def validate_ticker(ticker: str) -> str:
     
     # Check if ticker contains only valid characters before converting to uppercase
     # Ticker should be 1-10 letters (uppercase or lowercase), may contain dots for special cases
-    if not re.match(r'^[A-Za-z]{1,10}(\.[A-Za-z]{1,2})?$', ticker):
+    if not _TICKER_RE.match(ticker):
         raise ValueError(f"Invalid ticker format: {ticker}. Must be 1-10 letters only.")
     
     # Convert to uppercase after validation
@@ -156,8 +172,7 @@ def validate_email(email: str) -> str:
     email = email.strip().lower()
     
     # Basic email validation regex
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email):
+    if not _EMAIL_RE.match(email):
         raise ValueError(f"Invalid email format: {email}")
     
     # Check for common SQL injection patterns
@@ -187,13 +202,13 @@ def validate_password(password: str) -> None:
         raise ValueError("Password must be at most 128 characters long")
     
     # Check for at least one uppercase, one lowercase, one digit
-    if not re.search(r'[A-Z]', password):
+    if not _UPPERCASE_RE.search(password):
         raise ValueError("Password must contain at least one uppercase letter")
     
-    if not re.search(r'[a-z]', password):
+    if not _LOWERCASE_RE.search(password):
         raise ValueError("Password must contain at least one lowercase letter")
     
-    if not re.search(r'\d', password):
+    if not _DIGIT_RE.search(password):
         raise ValueError("Password must contain at least one digit")
 
 
@@ -247,15 +262,8 @@ def validate_search_query(query: str) -> str:
         raise ValueError("Search query too long (max 100 characters)")
     
     # Check for SQL injection patterns
-    sql_patterns = [
-        r"(\bUNION\b|\bSELECT\b|\bINSERT\b|\bUPDATE\b|\bDELETE\b|\bDROP\b)",
-        r"(--|;|\/\*|\*\/)",
-        r"(\bOR\b\s+\d+\s*=\s*\d+|\bAND\b\s+\d+\s*=\s*\d+)"
-    ]
-    
-    for pattern in sql_patterns:
-        if re.search(pattern, query, re.IGNORECASE):
-            raise ValueError("Search query contains invalid characters")
+    if _SQL_INJECTION_RE.search(query):
+        raise ValueError("Search query contains invalid characters")
     
     # Return query without HTML escaping (stock symbols don't need escaping)
     return query
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import pytest
 
@@ -10,17 +11,46 @@ os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "15"
 os.environ["REFRESH_TOKEN_EXPIRE_DAYS"] = "7"
 os.environ["TESTING"] = "true"  # Disable CSRF protection in tests
 
-from sqlalchemy import create_engine, event, TypeDecorator, CHAR, Text, String
+from sqlalchemy import create_engine, delete, event, insert, TypeDecorator, CHAR, Text, String
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
 import fakeredis
 import uuid as uuid_pkg
 import json
+from hypothesis import HealthCheck, Phase, settings as hypothesis_settings
 
 from app.database import Base
 from app.config import get_settings
 
+try:
+    import uvloop
+except ImportError:  # uvloop ships with uvicorn[standard] but not on Windows
+    uvloop = None
+
+
+# Shared settings for property tests whose examples hit the database.
+# Per-example SQL makes the default deadline flaky, and shrinking or explaining
+# a failure would re-run the DB work many times.
+hypothesis_settings.register_profile(
+    "db_heavy",
+    deadline=None,
+    max_examples=5,
+    phases=[Phase.explicit, Phase.reuse, Phase.generate],
+    suppress_health_check=[HealthCheck.function_scoped_fixture, HealthCheck.too_slow],
+)
+
+# Shared settings for property tests that only exercise mocks and in-memory
+# services: the same small example budget, without shrinking or explaining.
+# Examples are derandomized, so every run draws the same fixed set.
+hypothesis_settings.register_profile(
+    "fast",
+    deadline=None,
+    max_examples=5,
+    derandomize=True,
+    phases=[Phase.explicit, Phase.reuse, Phase.generate],
+)
+
 
 class GUID(TypeDecorator):
     """Platform-independent GUID type.
@@ -108,41 +138,92 @@ class INETType(TypeDecorator):
         return value
 
 
-@pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database session for each test."""
-    # Use in-memory SQLite for testing
+# Replace UUID, JSONB, and INET columns for SQLite compatibility
+@event.listens_for(Base.metadata, "before_create")
+def receive_before_create(target, connection, **kw):
+    """Replace PostgreSQL-specific types with compatible types for SQLite."""
+    for table in target.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, UUID):
+                column.type = GUID()
+            elif isinstance(column.type, JSONB):
+                column.type = JSONType()
+            elif isinstance(column.type, INET):
+                column.type = INETType()
+
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+@pytest.fixture(scope="module")
+def db_engine():
+    """Create an in-memory database whose schema is shared by a test module."""
+    # Use in-memory SQLite for testing. Each pytest-xdist worker is a separate
+    # process with its own in-memory database, so workers never share state.
     engine = create_engine(
         "sqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
     
-    # Replace UUID, JSONB, and INET columns for SQLite compatibility
-    @event.listens_for(Base.metadata, "before_create")
-    def receive_before_create(target, connection, **kw):
-        """Replace PostgreSQL-specific types with compatible types for SQLite."""
-        for table in target.tables.values():
-            for column in table.columns:
-                if isinstance(column.type, UUID):
-                    column.type = GUID()
-                elif isinstance(column.type, JSONB):
-                    column.type = JSONType()
-                elif isinstance(column.type, INET):
-                    column.type = INETType()
+    # pysqlite's own transaction handling breaks SAVEPOINT, so disable it and
+    # let SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
     
-    # Create all tables
+    # Create all tables once; tests roll their changes back instead
     Base.metadata.create_all(bind=engine)
     
-    # Create session
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    session = TestingSessionLocal()
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def db_session(db_engine):
+    """Create a database session whose changes are rolled back after each test."""
+    # The session runs inside an outer transaction and uses SAVEPOINTs for its
+    # own commits and rollbacks, so code under test can commit freely
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def event_loop_policy_uvloop():
+    """Run test event loops on uvloop, as uvicorn does in production, when available."""
+    if uvloop is None:
+        yield
+        return
+    
+    previous_policy = asyncio.get_event_loop_policy()
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    try:
+        yield
+    finally:
+        asyncio.set_event_loop_policy(previous_policy)
+
+
+@pytest.fixture(scope="module")
+def agent_loop():
+    """Provide one event loop for the synchronous agent runs in a test module."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
 
 @pytest.fixture(scope="function")
@@ -161,12 +242,20 @@ def settings():
 
 # Imports for API testing
 from fastapi.testclient import TestClient
+import httpx
+import pytest_asyncio
 from app.main import app
 from app.database import get_db
 from app.redis_client import get_redis
-from app.models import User
+from app.models import User, Portfolio, StockPosition, Notification
 from app.services.auth_service import AuthService
+from app.services.alert_service import AlertService
+from app.services.portfolio_service import PortfolioService
+from app.encryption import get_encryption_service
+from app.services import sentiment_analyzer as sentiment_analyzer_module
+from app.services.sentiment_analyzer import SentimentAnalyzer
 import bcrypt
+from unittest.mock import Mock
 
 
 @pytest.fixture(scope="function")
@@ -194,12 +283,34 @@ def test_redis(redis_client):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(scope="module")
+def mocked_redis():
+    """Point the news and stock data services at a Mock Redis that always misses."""
+    # Module scoped so Hypothesis examples never re-enter it. The mock is shared
+    # by every test in the module; call reset_mock() before asserting on calls
+    mock_redis = Mock()
+    mock_redis.get.return_value = None
+    mock_redis.setex.return_value = True
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.services.news_service.get_redis", lambda: mock_redis)
+        mp.setattr("app.services.stock_data_service.get_redis", lambda: mock_redis)
+        yield mock_redis
+
+
 @pytest.fixture(scope="function")
 def client(test_db, test_redis):
     """Create a test client with overridden dependencies."""
     return TestClient(app)
 
 
+@pytest_asyncio.fixture(scope="function")
+async def aclient(test_db, test_redis):
+    """Create an async test client that calls the app directly over ASGI."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
 @pytest.fixture(scope="function")
 def test_user(test_db):
     """Create a test user in the database."""
@@ -220,6 +331,14 @@ def test_user(test_db):
     return user
 
 
+@pytest.fixture(scope="function")
+def fast_bcrypt(monkeypatch):
+    """Hash passwords at bcrypt's minimum cost so registration-heavy tests stay fast."""
+    # checkpw reads the cost from the stored hash, so verification speeds up too
+    gensalt = bcrypt.gensalt
+    monkeypatch.setattr(bcrypt, "gensalt", lambda *args, **kwargs: gensalt(rounds=4))
+
+
 @pytest.fixture(scope="function")
 def auth_headers(test_user, test_db, test_redis):
     """Create authentication headers for test requests."""
@@ -231,3 +350,76 @@ def auth_headers(test_user, test_db, test_redis):
     return {
         "Authorization": f"Bearer {result['access_token']}"
     }
+
+
+@pytest.fixture(scope="function")
+def alert_service(db_session):
+    """Create an alert service bound to the test database session."""
+    return AlertService(db_session)
+
+
+@pytest.fixture(scope="function")
+def portfolio_service(db_session):
+    """Create a portfolio service bound to the test database session."""
+    return PortfolioService(db_session)
+
+
+@pytest.fixture(scope="function")
+def user_portfolio(db_session):
+    """Create a single user and portfolio shared by every example of a test."""
+    user = User(
+        email=f"test_{uuid_pkg.uuid4()}@example.com",
+        password_hash="hashed_password"
+    )
+    db_session.add(user)
+    db_session.flush()  # Assigns user.id without a commit/refresh round trip
+    
+    portfolio = Portfolio(user_id=user.id)
+    db_session.add(portfolio)
+    db_session.flush()
+    
+    return user, portfolio
+
+
+def _reset_portfolio(db_session, user, portfolio):
+    """Remove positions and notifications left behind by a previous example."""
+    db_session.execute(delete(StockPosition).where(StockPosition.portfolio_id == portfolio.id))
+    db_session.execute(delete(Notification).where(Notification.user_id == user.id))
+    db_session.expire(portfolio, ["positions"])
+
+
+def _add_positions(db_session, portfolio, positions):
+    """Insert position rows for a portfolio in a single multi-row INSERT."""
+    db_session.execute(insert(StockPosition), [
+        {"portfolio_id": portfolio.id, **position}
+        for position in positions
+    ])
+    # Stay in the test's transaction; just reload the positions collection
+    db_session.expire(portfolio, ["positions"])
+
+
+def _resolved(result):
+    """Return a future already holding result, for a mock method awaited once."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
+
+
+@pytest.fixture(scope="session")
+def encryption_service():
+    """Get the encryption service, whose key is derived once per test session."""
+    return get_encryption_service()
+
+
+@pytest.fixture(scope="session")
+def sentiment_analyzer():
+    """Create one sentiment analyzer, and its model fallback, for the test session."""
+    return SentimentAnalyzer()
+
+
+@pytest.fixture(scope="function")
+def score_cache(monkeypatch):
+    """Give the test an empty sentiment score cache, restoring the shared one afterwards."""
+    cache = {}
+    monkeypatch.setattr(sentiment_analyzer_module, "_score_cache", cache)
+    return cache
@@ -49,6 +49,41 @@ class TestAlertService:
         assert alert.is_active is True
         assert alert.triggered_at is None
     
+    def test_create_price_alerts_bulk(self, db_session):
+        """Test creating several price alerts in one call."""
+        # Create user
+        user = User(
+            email="test@example.com",
+            password_hash="hashed_password"
+        )
+        db_session.add(user)
+        db_session.commit()
+        db_session.refresh(user)
+        
+        # Create alert service
+        alert_service = AlertService(db_session)
+        
+        # Create alerts
+        alerts = alert_service.create_price_alerts_bulk(
+            user_id=user.id,
+            ticker="aapl",
+            specs=[
+                ("above", 150.00, ["in-app"]),
+                ("below", 120.00, ["in-app", "email"])
+            ]
+        )
+        
+        # Verify returned alerts
+        assert len(alerts) == 2
+        assert all(alert.id is not None for alert in alerts)
+        assert [alert.condition for alert in alerts] == ["above", "below"]
+        assert all(alert.ticker == "AAPL" for alert in alerts)
+        
+        # Verify alerts were persisted
+        stored = alert_service.get_user_alerts(user.id)
+        assert {a.id for a in stored} == {a.id for a in alerts}
+        assert all(a.is_active is True for a in stored)
+    
     def test_get_user_alerts(self, db_session):
         """Test retrieving user alerts."""
         # Create user
@@ -296,6 +331,7 @@ class TestAlertService:
         assert len(notifications) == 1
         assert notifications[0].type == "price_alert"
         assert "AAPL" in notifications[0].title
+        assert result["notification_id"] == str(notifications[0].id)
     
     def test_send_notification_in_app(self, db_session):
         """Test sending in-app notification."""
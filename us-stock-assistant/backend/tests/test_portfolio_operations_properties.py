@@ -4,17 +4,29 @@ Property-based tests for portfolio operations.
 Tests:
 - Property 6: Invalid Ticker Rejection
 """
+import re
 import pytest
-from hypothesis import given, strategies as st, settings, HealthCheck, assume
+from hypothesis import given, strategies as st, settings
 from datetime import date, timedelta
 from decimal import Decimal
-import uuid
 from sqlalchemy.orm import Session
 
 from app.models import User, Portfolio
 from app.services.portfolio_service import PortfolioService
 
 
+# derandomize=True below disables Hypothesis's example database, so every run
+# draws the same fixed examples rather than replaying saved failures
+DB_HEAVY = settings.get_profile("db_heavy")
+
+
+# Matches error messages that report a ticker validation failure
+_TICKER_ERR_RE = re.compile(r'ticker|invalid|format', re.IGNORECASE)
+
+# Well-formed ticker shape, checked independently of the app's validator
+_VALID_TICKER_RE = re.compile(r'[A-Z]{1,10}')
+
+
 # Custom strategies for generating test data
 @st.composite
 def invalid_ticker_strategy(draw):
@@ -43,50 +55,54 @@ def invalid_ticker_strategy(draw):
         return ' '.join(parts)
 
 
-@st.composite
-def valid_position_data_strategy(draw):
+def _is_invalid_ticker(ticker: str) -> bool:
+    """Return True unless the ticker is 1-10 letters once stripped and uppercased."""
+    return not _VALID_TICKER_RE.fullmatch(ticker.strip().upper())
+
+
+# Integer draws are cheaper than st.decimals; scale to 4 and 2 decimal places
+_QUANTITY = st.integers(min_value=1, max_value=100_000_000).map(lambda n: Decimal(n) / 10000)
+_PURCHASE_PRICE = st.integers(min_value=1, max_value=1_000_000).map(lambda n: Decimal(n) / 100)
+
+
+def valid_position_data_strategy():
     """Generate valid stock position data (except ticker)."""
-    quantity = draw(st.decimals(min_value=Decimal('0.0001'), max_value=Decimal('10000'), places=4))
-    purchase_price = draw(st.decimals(min_value=Decimal('0.01'), max_value=Decimal('10000'), places=2))
-    
-    # Generate a date in the past (not future)
-    days_ago = draw(st.integers(min_value=0, max_value=3650))  # Up to 10 years ago
-    purchase_date = date.today() - timedelta(days=days_ago)
-    
-    return {
-        'quantity': quantity,
-        'purchase_price': purchase_price,
-        'purchase_date': purchase_date
-    }
+    return st.fixed_dictionaries({
+        'quantity': _QUANTITY,
+        'purchase_price': _PURCHASE_PRICE,
+        # Generate a date in the past (not future), up to 10 years ago
+        'purchase_date': st.integers(min_value=0, max_value=3650).map(
+            lambda days_ago: date.today() - timedelta(days=days_ago)
+        )
+    })
 
 
-@st.composite
-def user_data_strategy(draw):
-    """Generate valid user data with unique email."""
-    # Generate unique email using UUID to avoid collisions
-    unique_id = str(uuid.uuid4())[:8]
-    base_email = draw(st.from_regex(r'^[a-z0-9]+@[a-z]+\.[a-z]{2,}$', fullmatch=True))
-    email = f"{unique_id}_{base_email}"
-    password_hash = draw(st.text(alphabet=st.characters(blacklist_categories=('Cs',)), min_size=10, max_size=100))
-    return {
-        'email': email,
-        'password_hash': password_hash
-    }
+@pytest.fixture
+def test_user(db_session: Session):
+    """Create a single test user shared by every example of a test."""
+    user = User(
+        email="property_test@example.com",
+        password_hash="hashed_password"
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
 
 
 class TestInvalidTickerRejection:
     """Test that invalid ticker symbols are rejected."""
     
     @given(
-        user_data=user_data_strategy(),
-        invalid_ticker=invalid_ticker_strategy(),
+        invalid_ticker=invalid_ticker_strategy().filter(_is_invalid_ticker),
         position_data=valid_position_data_strategy()
     )
-    @settings(max_examples=5, suppress_health_check=[HealthCheck.function_scoped_fixture])
-    def test_property_6_invalid_ticker_rejection(
+    @settings(DB_HEAVY, derandomize=True)
+    def test_property_6_rejection_and_no_side_effects(
         self,
         db_session: Session,
-        user_data: dict,
+        test_user: User,
+        portfolio_service: PortfolioService,
         invalid_ticker: str,
         position_data: dict
     ):
@@ -95,26 +111,21 @@ class TestInvalidTickerRejection:
         
         For any invalid ticker symbol (empty string, special characters, 
         non-existent ticker), the portfolio service should reject the addition 
-        and return an error.
+        and return an error. The failed attempt must leave no side effects, so
+        a valid position can still be added afterwards.
         
         **Validates: Requirements 2.2**
         """
         # Ensure clean session state
         db_session.rollback()
         
-        # Create user
-        user = User(**user_data)
-        db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
-        
-        # Create portfolio service
-        portfolio_service = PortfolioService(db_session)
+        portfolio = portfolio_service.get_portfolio(test_user.id)
+        positions_before = len(portfolio.positions) if portfolio else 0
         
         # Attempt to add position with invalid ticker
-        with pytest.raises((ValueError, Exception)) as exc_info:
+        with pytest.raises(ValueError) as exc_info:
             portfolio_service.add_position(
-                user_id=user.id,
+                user_id=test_user.id,
                 ticker=invalid_ticker,
                 quantity=position_data['quantity'],
                 purchase_price=position_data['purchase_price'],
@@ -122,68 +133,19 @@ class TestInvalidTickerRejection:
             )
         
         # Verify error message indicates ticker validation failure
-        error_message = str(exc_info.value).lower()
-        assert any(keyword in error_message for keyword in ['ticker', 'invalid', 'format']), \
+        assert _TICKER_ERR_RE.search(str(exc_info.value)) is not None, \
             f"Error message should mention ticker validation: {exc_info.value}"
         
         # Verify no position was created
-        portfolio = portfolio_service.get_portfolio(user.id)
-        if portfolio:
-            assert len(portfolio.positions) == 0, "No position should be created with invalid ticker"
-    
-    @given(
-        user_data=user_data_strategy(),
-        invalid_ticker=invalid_ticker_strategy(),
-        position_data=valid_position_data_strategy()
-    )
-    @settings(max_examples=5, suppress_health_check=[HealthCheck.function_scoped_fixture])
-    def test_property_6_invalid_ticker_no_side_effects(
-        self,
-        db_session: Session,
-        user_data: dict,
-        invalid_ticker: str,
-        position_data: dict
-    ):
-        """
-        Test that attempting to add an invalid ticker doesn't leave side effects.
-        
-        After a failed attempt with invalid ticker, valid operations should still work.
-        
-        **Validates: Requirements 2.2**
-        """
-        # Ensure clean session state
-        db_session.rollback()
-        
-        # Create user
-        user = User(**user_data)
-        db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
-        
-        # Create portfolio service
-        portfolio_service = PortfolioService(db_session)
-        
-        # Attempt to add position with invalid ticker
-        try:
-            portfolio_service.add_position(
-                user_id=user.id,
-                ticker=invalid_ticker,
-                quantity=position_data['quantity'],
-                purchase_price=position_data['purchase_price'],
-                purchase_date=position_data['purchase_date']
-            )
-            # If no exception, the ticker might have been valid by chance
-            # (e.g., single letter like "A" is valid)
-            # Skip this test case
-            assume(False)
-        except (ValueError, Exception):
-            # Expected - invalid ticker should be rejected
-            pass
+        portfolio = portfolio_service.get_portfolio(test_user.id)
+        positions_after = len(portfolio.positions) if portfolio else 0
+        assert positions_after == positions_before, \
+            "No position should be created with invalid ticker"
         
         # Verify we can still add a valid position after the error
         valid_ticker = "AAPL"
         valid_position = portfolio_service.add_position(
-            user_id=user.id,
+            user_id=test_user.id,
             ticker=valid_ticker,
             quantity=position_data['quantity'],
             purchase_price=position_data['purchase_price'],
@@ -195,54 +157,36 @@ class TestInvalidTickerRejection:
         assert valid_position.ticker == valid_ticker
         assert valid_position.quantity == position_data['quantity']
         
-        # Verify portfolio has exactly one position
-        portfolio = portfolio_service.get_portfolio(user.id)
+        # Verify the portfolio gained exactly one position (the user is
+        # shared across examples, so earlier examples may have added some)
+        portfolio = portfolio_service.get_portfolio(test_user.id)
         assert portfolio is not None
-        assert len(portfolio.positions) == 1
-        assert portfolio.positions[0].ticker == valid_ticker
+        assert len(portfolio.positions) == positions_before + 1
+        assert valid_position in portfolio.positions
     
-    @given(
-        user_data=user_data_strategy(),
-        position_data=valid_position_data_strategy()
-    )
-    @settings(max_examples=5, suppress_health_check=[HealthCheck.function_scoped_fixture])
+    @pytest.mark.parametrize("whitespace_ticker", ["", "   ", "\t", "\n", " \t\n "])
     def test_property_6_whitespace_ticker_rejection(
         self,
         db_session: Session,
-        user_data: dict,
-        position_data: dict
+        test_user: User,
+        portfolio_service: PortfolioService,
+        whitespace_ticker: str
     ):
         """
         Test that tickers with only whitespace are rejected.
         
         **Validates: Requirements 2.2**
         """
-        # Ensure clean session state
-        db_session.rollback()
-        
-        # Create user
-        user = User(**user_data)
-        db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
-        
-        # Create portfolio service
-        portfolio_service = PortfolioService(db_session)
-        
-        # Test various whitespace-only tickers
-        whitespace_tickers = ["", "   ", "\t", "\n", " \t\n "]
-        
-        for whitespace_ticker in whitespace_tickers:
-            with pytest.raises((ValueError, Exception)):
-                portfolio_service.add_position(
-                    user_id=user.id,
-                    ticker=whitespace_ticker,
-                    quantity=position_data['quantity'],
-                    purchase_price=position_data['purchase_price'],
-                    purchase_date=position_data['purchase_date']
-                )
+        with pytest.raises((ValueError, Exception)):
+            portfolio_service.add_position(
+                user_id=test_user.id,
+                ticker=whitespace_ticker,
+                quantity=Decimal('10'),
+                purchase_price=Decimal('150.00'),
+                purchase_date=date.today() - timedelta(days=30)
+            )
         
         # Verify no positions were created
-        portfolio = portfolio_service.get_portfolio(user.id)
+        portfolio = portfolio_service.get_portfolio(test_user.id)
         if portfolio:
             assert len(portfolio.positions) == 0
@@ -9,7 +9,9 @@ Tests cover:
 - Security headers
 - Data encryption
 """
+import asyncio
 import pytest
+from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from datetime import date
 from decimal import Decimal
@@ -26,11 +28,16 @@ from app.validators import (
 )
 from app.encryption import EncryptionService, get_encryption_service
 from app.database import get_db
+from app.main import app
 from app.crud.user import create_user
-from app.services.auth_service import AuthService
 from app.redis_client import get_redis
 
 
+# Over-length inputs, one past the password (128) and query/string (100) limits
+_TOO_LONG_PASSWORD = "P" * 129
+_TOO_LONG_STRING = "a" * 101
+
+
 class TestInputValidation:
     """Test input validation and sanitization."""
     
@@ -41,22 +48,17 @@ class TestInputValidation:
         assert validate_ticker("  MSFT  ") == "MSFT"
         assert validate_ticker("BRK.A") == "BRK.A"
     
-    def test_validate_ticker_invalid(self):
+    @pytest.mark.parametrize("ticker, message", [
+        ("", "cannot be empty"),
+        ("   ", "cannot be empty"),
+        ("AAPL123", "Invalid ticker format"),
+        ("AA@PL", "Invalid ticker format"),
+        ("TOOLONGTICKER", "Invalid ticker format"),
+    ])
+    def test_validate_ticker_invalid(self, ticker, message):
         """Test ticker validation rejects invalid inputs."""
-        with pytest.raises(ValueError, match="cannot be empty"):
-            validate_ticker("")
-        
-        with pytest.raises(ValueError, match="cannot be empty"):
-            validate_ticker("   ")
-        
-        with pytest.raises(ValueError, match="Invalid ticker format"):
-            validate_ticker("AAPL123")
-        
-        with pytest.raises(ValueError, match="Invalid ticker format"):
-            validate_ticker("AA@PL")
-        
-        with pytest.raises(ValueError, match="Invalid ticker format"):
-            validate_ticker("TOOLONGTICKER")
+        with pytest.raises(ValueError, match=message):
+            validate_ticker(ticker)
     
     def test_validate_email_valid(self):
         """Test email validation with valid inputs."""
@@ -64,19 +66,16 @@ class TestInputValidation:
         assert validate_email("  USER@EXAMPLE.COM  ") == "user@example.com"
         assert validate_email("test.user+tag@domain.co.uk") == "test.user+tag@domain.co.uk"
     
-    def test_validate_email_invalid(self):
+    @pytest.mark.parametrize("email, message", [
+        ("", "cannot be empty"),
+        ("notanemail", "Invalid email format"),
+        ("@example.com", "Invalid email format"),
+        ("user@", "Invalid email format"),
+    ])
+    def test_validate_email_invalid(self, email, message):
         """Test email validation rejects invalid inputs."""
-        with pytest.raises(ValueError, match="cannot be empty"):
-            validate_email("")
-        
-        with pytest.raises(ValueError, match="Invalid email format"):
-            validate_email("notanemail")
-        
-        with pytest.raises(ValueError, match="Invalid email format"):
-            validate_email("@example.com")
-        
-        with pytest.raises(ValueError, match="Invalid email format"):
-            validate_email("user@")
+        with pytest.raises(ValueError, match=message):
+            validate_email(email)
     
     def test_validate_email_sql_injection(self):
         """Test email validation prevents SQL injection."""
@@ -97,25 +96,18 @@ class TestInputValidation:
         validate_password("MyP@ssw0rd!")
         validate_password("Abcdefgh1")
     
-    def test_validate_password_invalid(self):
+    @pytest.mark.parametrize("password, message", [
+        ("", "cannot be empty"),
+        ("Pass1", "at least 8 characters"),
+        ("password123", "uppercase letter"),
+        ("PASSWORD123", "lowercase letter"),
+        ("Password", "digit"),
+        (_TOO_LONG_PASSWORD, "at most 128 characters"),
+    ])
+    def test_validate_password_invalid(self, password, message):
         """Test password validation rejects weak passwords."""
-        with pytest.raises(ValueError, match="cannot be empty"):
-            validate_password("")
-        
-        with pytest.raises(ValueError, match="at least 8 characters"):
-            validate_password("Pass1")
-        
-        with pytest.raises(ValueError, match="uppercase letter"):
-            validate_password("password123")
-        
-        with pytest.raises(ValueError, match="lowercase letter"):
-            validate_password("PASSWORD123")
-        
-        with pytest.raises(ValueError, match="digit"):
-            validate_password("Password")
-        
-        with pytest.raises(ValueError, match="at most 128 characters"):
-            validate_password("P" * 129)
+        with pytest.raises(ValueError, match=message):
+            validate_password(password)
     
     def test_validate_search_query_valid(self):
         """Test search query validation with valid inputs."""
@@ -123,22 +115,17 @@ class TestInputValidation:
         assert validate_search_query("Apple Inc") == "Apple Inc"
         assert validate_search_query("  tech stocks  ") == "tech stocks"
     
-    def test_validate_search_query_invalid(self):
+    @pytest.mark.parametrize("query, message", [
+        ("", "cannot be empty"),
+        (_TOO_LONG_STRING, "too long"),
+        ("AAPL' OR 1=1--", "invalid characters"),
+        ("AAPL; DROP TABLE users;", "invalid characters"),
+        ("AAPL UNION SELECT * FROM users", "invalid characters"),
+    ])
+    def test_validate_search_query_invalid(self, query, message):
         """Test search query validation rejects malicious inputs."""
-        with pytest.raises(ValueError, match="cannot be empty"):
-            validate_search_query("")
-        
-        with pytest.raises(ValueError, match="too long"):
-            validate_search_query("a" * 101)
-        
-        with pytest.raises(ValueError, match="invalid characters"):
-            validate_search_query("AAPL' OR 1=1--")
-        
-        with pytest.raises(ValueError, match="invalid characters"):
-            validate_search_query("AAPL; DROP TABLE users;")
-        
-        with pytest.raises(ValueError, match="invalid characters"):
-            validate_search_query("AAPL UNION SELECT * FROM users")
+        with pytest.raises(ValueError, match=message):
+            validate_search_query(query)
     
     def test_sanitize_string_xss_prevention(self):
         """Test string sanitization prevents XSS attacks."""
@@ -149,7 +136,7 @@ class TestInputValidation:
     def test_sanitize_string_max_length(self):
         """Test string sanitization enforces max length."""
         with pytest.raises(ValueError, match="exceeds maximum length"):
-            sanitize_string("a" * 101, max_length=100)
+            sanitize_string(_TOO_LONG_STRING, max_length=100)
     
     def test_validate_positive_quantity(self):
         """Test quantity validation."""
@@ -172,6 +159,7 @@ class TestInputValidation:
             validate_positive_price(Decimal("-10"))
 
 
+@pytest.mark.usefixtures("fast_bcrypt")
 class TestAuthentication:
     """Test authentication and authorization."""
     
@@ -215,37 +203,28 @@ class TestAuthentication:
         
         assert response.status_code == 422  # Validation error
     
-    def test_login_with_valid_credentials(self, client, db_session, redis_client):
+    def test_login_with_valid_credentials(self, client, test_user):
         """Test login with valid credentials."""
-        # Create user first
-        auth_service = AuthService(db_session, redis_client)
-        auth_service.register("testuser@example.com", "TestPass123")
-        
-        # Login
         response = client.post(
             "/api/auth/login",
             json={
-                "email": "testuser@example.com",
-                "password": "TestPass123"
+                "email": test_user.email,
+                "password": test_user.plain_password
             }
         )
         
         assert response.status_code == 200
         data = response.json()
         assert "access_token" in data
-        assert data["user"]["email"] == "testuser@example.com"
+        assert data["user"]["email"] == test_user.email
     
-    def test_login_with_invalid_credentials(self, client, db_session, redis_client):
+    def test_login_with_invalid_credentials(self, client, test_user):
         """Test login rejects invalid credentials."""
-        # Create user first
-        auth_service = AuthService(db_session, redis_client)
-        auth_service.register("testuser2@example.com", "TestPass123")
-        
         # Try login with wrong password
         response = client.post(
             "/api/auth/login",
             json={
-                "email": "testuser2@example.com",
+                "email": test_user.email,
                 "password": "WrongPassword123"
             }
         )
@@ -258,22 +237,13 @@ class TestAuthentication:
         
         assert response.status_code == 401
     
-    def test_access_protected_endpoint_with_valid_token(self, client, db_session, redis_client):
+    def test_access_protected_endpoint_with_valid_token(self, client, test_user, auth_headers):
         """Test accessing protected endpoint with valid token."""
-        # Create user and get token
-        auth_service = AuthService(db_session, redis_client)
-        result = auth_service.register("authuser@example.com", "AuthPass123")
-        token = result["access_token"]
-        
-        # Access protected endpoint
-        response = client.get(
-            "/api/auth/me",
-            headers={"Authorization": f"Bearer {token}"}
-        )
+        response = client.get("/api/auth/me", headers=auth_headers)
         
         assert response.status_code == 200
         data = response.json()
-        assert data["email"] == "authuser@example.com"
+        assert data["email"] == test_user.email
     
     def test_access_protected_endpoint_with_invalid_token(self, client):
         """Test accessing protected endpoint with invalid token."""
@@ -285,6 +255,7 @@ class TestAuthentication:
         assert response.status_code == 401
 
 
+@pytest.mark.usefixtures("fast_bcrypt")
 class TestRateLimiting:
     """Test rate limiting on API endpoints."""
     
@@ -306,14 +277,19 @@ class TestRateLimiting:
         status_codes = [r.status_code for r in responses]
         assert 429 in status_codes or 201 in status_codes
     
-    def test_rate_limit_on_search_endpoint(self, client):
+    @pytest.mark.asyncio
+    async def test_rate_limit_on_search_endpoint(self, aclient):
         """Test rate limiting on search endpoint (60/minute)."""
-        # Make multiple requests
+        # Make up to 65 requests, sent concurrently in batches of 10 so the
+        # loop can still stop once the limit is hit
         responses = []
-        for i in range(65):
-            response = client.get("/api/stocks/search?q=AAPL")
-            responses.append(response)
-            if response.status_code == 429:
+        while len(responses) < 65:
+            batch_size = min(10, 65 - len(responses))
+            batch = await asyncio.gather(
+                *[aclient.get("/api/stocks/search?q=AAPL") for _ in range(batch_size)]
+            )
+            responses.extend(batch)
+            if any(r.status_code == 429 for r in batch):
                 break
         
         # Should eventually hit rate limit
@@ -322,12 +298,19 @@ class TestRateLimiting:
         assert 429 in status_codes or all(s in [200, 500] for s in status_codes)
 
 
+@pytest.fixture(scope="class")
+def health_response():
+    """Fetch /health once for every header check in a test class."""
+    # /health touches neither the database nor Redis, so no overrides are needed
+    return TestClient(app).get("/health")
+
+
 class TestSecurityHeaders:
     """Test security headers in responses."""
     
-    def test_security_headers_present(self, client):
+    def test_security_headers_present(self, health_response):
         """Test that security headers are present in responses."""
-        response = client.get("/health")
+        response = health_response
         
         # Check for security headers
         assert "X-Content-Type-Options" in response.headers
@@ -345,9 +328,9 @@ class TestSecurityHeaders:
         assert "Referrer-Policy" in response.headers
         assert "Permissions-Policy" in response.headers
     
-    def test_server_header_removed(self, client):
+    def test_server_header_removed(self, health_response):
         """Test that Server header is removed to prevent information disclosure."""
-        response = client.get("/health")
+        response = health_response
         
         # Server header should be removed or not present
         assert "Server" not in response.headers or response.headers["Server"] != "uvicorn"
@@ -356,59 +339,54 @@ class TestSecurityHeaders:
 class TestDataEncryption:
     """Test data encryption functionality."""
     
-    def test_encrypt_decrypt_roundtrip(self):
+    def test_encrypt_decrypt_roundtrip(self, encryption_service):
         """Test encryption and decryption round-trip."""
-        service = get_encryption_service()
-        
         plaintext = "my-secret-api-key-12345"
-        encrypted = service.encrypt(plaintext)
-        decrypted = service.decrypt(encrypted)
+        encrypted = encryption_service.encrypt(plaintext)
+        decrypted = encryption_service.decrypt(encrypted)
         
         assert encrypted != plaintext
         assert decrypted == plaintext
     
-    def test_encrypt_empty_string_fails(self):
+    def test_encrypt_empty_string_fails(self, encryption_service):
         """Test that encrypting empty string fails."""
-        service = get_encryption_service()
-        
         with pytest.raises(ValueError, match="Cannot encrypt empty string"):
-            service.encrypt("")
+            encryption_service.encrypt("")
     
-    def test_decrypt_invalid_ciphertext_fails(self):
+    def test_decrypt_invalid_ciphertext_fails(self, encryption_service):
         """Test that decrypting invalid ciphertext fails."""
-        service = get_encryption_service()
-        
         with pytest.raises(ValueError, match="Decryption failed"):
-            service.decrypt("invalid_ciphertext")
+            encryption_service.decrypt("invalid_ciphertext")
     
-    def test_encrypt_dict_fields(self):
+    def test_encryption_service_is_shared(self, encryption_service):
+        """Test that the service, and the Fernet key derived for it, is created once."""
+        assert get_encryption_service() is encryption_service
+        assert get_encryption_service()._fernet is encryption_service._fernet
+    
+    def test_encrypt_dict_fields(self, encryption_service):
         """Test encrypting specific fields in a dictionary."""
-        service = get_encryption_service()
-        
         data = {
             "user_id": "123",
             "api_key": "secret-key",
             "public_field": "public-value"
         }
         
-        encrypted_data = service.encrypt_dict(data, ["api_key"])
+        encrypted_data = encryption_service.encrypt_dict(data, ["api_key"])
         
         assert encrypted_data["user_id"] == "123"
         assert encrypted_data["public_field"] == "public-value"
         assert encrypted_data["api_key"] != "secret-key"
         assert len(encrypted_data["api_key"]) > len("secret-key")
     
-    def test_decrypt_dict_fields(self):
+    def test_decrypt_dict_fields(self, encryption_service):
         """Test decrypting specific fields in a dictionary."""
-        service = get_encryption_service()
-        
         data = {
             "user_id": "123",
             "api_key": "secret-key"
         }
         
-        encrypted_data = service.encrypt_dict(data, ["api_key"])
-        decrypted_data = service.decrypt_dict(encrypted_data, ["api_key"])
+        encrypted_data = encryption_service.encrypt_dict(data, ["api_key"])
+        decrypted_data = encryption_service.decrypt_dict(encrypted_data, ["api_key"])
         
         assert decrypted_data["api_key"] == "secret-key"
 
@@ -420,9 +398,8 @@ class TestCSRFProtection:
         """Test that CSRF token cookie is set on GET requests."""
         response = client.get("/health")
         
-        # Check if csrf_token cookie is set
-        cookies = response.cookies
-        assert "csrf_token" in cookies or response.status_code == 200
+        # Check if csrf_token cookie is set, straight from the raw header
+        assert "csrf_token=" in response.headers.get("set-cookie", "") or response.status_code == 200
     
     def test_post_request_without_csrf_token_fails(self, client):
         """Test that POST requests without CSRF token fail."""
@@ -469,15 +446,13 @@ class TestXSSPrevention:
         assert "<script>" not in sanitized
         assert "&lt;script&gt;" in sanitized
     
-    def test_html_entities_escaped(self):
+    @pytest.mark.parametrize("malicious, expected_prefix", [
+        ("<img src=x onerror=alert('XSS')>", "&lt;img"),
+        ("<iframe src='evil.com'>", "&lt;iframe"),
+        ("javascript:alert('XSS')", "javascript:alert"),
+    ])
+    def test_html_entities_escaped(self, malicious, expected_prefix):
         """Test that HTML entities are properly escaped."""
-        inputs = [
-            ("<img src=x onerror=alert('XSS')>", "&lt;img"),
-            ("<iframe src='evil.com'>", "&lt;iframe"),
-            ("javascript:alert('XSS')", "javascript:alert"),
-        ]
-        
-        for malicious, expected_prefix in inputs:
-            sanitized = sanitize_string(malicious)
-            assert expected_prefix in sanitized
-            assert "<" not in sanitized or "&lt;" in sanitized
+        sanitized = sanitize_string(malicious)
+        assert expected_prefix in sanitized
+        assert "<" not in sanitized or "&lt;" in sanitized
@@ -8,14 +8,22 @@ Property 39: Stock Sentiment Aggregation
 """
 
 import pytest
-from hypothesis import given, strategies as st, settings, HealthCheck
-from unittest.mock import AsyncMock, Mock, patch
+from hypothesis import given, strategies as st, settings
+from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 from typing import List
 
+from app.services import sentiment_analyzer as sentiment_analyzer_module
 from app.services.sentiment_analyzer import SentimentAnalyzer, SentimentScore, StockSentiment
 from app.services.news_service import NewsService
-from app.mcp.tools.news import NewsMCPTools, NewsArticle
+from app.mcp.tools.news import NewsArticle
+from tests.conftest import _resolved
+
+
+FAST = settings.get_profile("fast")
+
+# Fixed publication time for test articles; sentiment never depends on it
+_NOW = datetime(2024, 1, 1, 12, 0, 0)
 
 
 # Hypothesis strategies for generating test data
@@ -29,6 +37,10 @@ def ticker_strategy(draw):
     ))
 
 
+# Built once and shared by every @given below
+_TICKER = ticker_strategy()
+
+
 @st.composite
 def news_article_strategy(draw, ticker: str = None, sentiment_hint: str = None):
     """Generate a news article with optional sentiment hint."""
@@ -78,22 +90,17 @@ def news_article_strategy(draw, ticker: str = None, sentiment_hint: str = None):
         headline=headline,
         source=draw(st.sampled_from(sources)),
         url=f"https://example.com/article/{draw(st.integers(min_value=1000, max_value=9999))}",
-        published_at=datetime.now() - timedelta(hours=draw(st.integers(min_value=0, max_value=48))),
+        published_at=_NOW - timedelta(hours=draw(st.integers(min_value=0, max_value=48))),
         summary=draw(st.text(min_size=50, max_size=200))
     )
 
 
 # Property 36: News Sentiment Assignment
-@pytest.mark.asyncio
 @given(
-    ticker=ticker_strategy()
+    ticker=_TICKER
 )
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_news_sentiment_assignment(ticker):
+@settings(FAST)
+def test_news_sentiment_assignment(sentiment_analyzer, ticker):
     """
     Property 36: News Sentiment Assignment
     
@@ -109,15 +116,12 @@ async def test_news_sentiment_assignment(ticker):
         headline=f"{ticker} announces strong quarterly earnings",
         source="Reuters",
         url="https://example.com/1",
-        published_at=datetime.now(),
+        published_at=_NOW,
         summary="Company reports record profits and beats analyst expectations"
     )
     
-    # Create sentiment analyzer
-    analyzer = SentimentAnalyzer()
-    
     # Analyze sentiment
-    sentiment = analyzer.analyzeSentiment(article)
+    sentiment = sentiment_analyzer.analyzeSentiment(article)
     
     # Verify sentiment score structure
     assert isinstance(sentiment, SentimentScore)
@@ -132,33 +136,25 @@ async def test_news_sentiment_assignment(ticker):
     assert 0.0 <= sentiment.confidence <= 1.0
 
 
-@pytest.mark.asyncio
-@given(
-    ticker=ticker_strategy()
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_positive_sentiment_detection(ticker):
+def test_positive_sentiment_detection(sentiment_analyzer):
     """
     Test that positive sentiment is correctly detected.
     
     Validates: Requirements 11.2
     """
+    ticker = "AAPL"
+    
     # Create article with positive keywords
     article = NewsArticle(
         id="test-positive",
         headline=f"{ticker} stock surges on strong earnings beat",
         source="Reuters",
         url="https://example.com/1",
-        published_at=datetime.now(),
+        published_at=_NOW,
         summary="Company reports record profits with strong growth and rising revenue"
     )
     
-    analyzer = SentimentAnalyzer()
-    sentiment = analyzer.analyzeSentiment(article)
+    sentiment = sentiment_analyzer.analyzeSentiment(article)
     
     # Should detect positive sentiment
     assert sentiment.label == "positive"
@@ -166,33 +162,25 @@ async def test_positive_sentiment_detection(ticker):
     assert sentiment.confidence > 0
 
 
-@pytest.mark.asyncio
-@given(
-    ticker=ticker_strategy()
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_negative_sentiment_detection(ticker):
+def test_negative_sentiment_detection(sentiment_analyzer):
     """
     Test that negative sentiment is correctly detected.
     
     Validates: Requirements 11.2
     """
+    ticker = "AAPL"
+    
     # Create article with negative keywords
     article = NewsArticle(
         id="test-negative",
         headline=f"{ticker} stock falls on weak earnings miss",
         source="Reuters",
         url="https://example.com/1",
-        published_at=datetime.now(),
+        published_at=_NOW,
         summary="Company reports losses with declining revenue and poor performance"
     )
     
-    analyzer = SentimentAnalyzer()
-    sentiment = analyzer.analyzeSentiment(article)
+    sentiment = sentiment_analyzer.analyzeSentiment(article)
     
     # Should detect negative sentiment
     assert sentiment.label == "negative"
@@ -200,33 +188,25 @@ async def test_negative_sentiment_detection(ticker):
     assert sentiment.confidence > 0
 
 
-@pytest.mark.asyncio
-@given(
-    ticker=ticker_strategy()
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_neutral_sentiment_detection(ticker):
+def test_neutral_sentiment_detection(sentiment_analyzer):
     """
     Test that neutral sentiment is correctly detected.
     
     Validates: Requirements 11.2
     """
+    ticker = "AAPL"
+    
     # Create article with no sentiment keywords
     article = NewsArticle(
         id="test-neutral",
         headline=f"{ticker} announces new CEO appointment",
         source="Reuters",
         url="https://example.com/1",
-        published_at=datetime.now(),
+        published_at=_NOW,
         summary="The board of directors has appointed a new chief executive officer"
     )
     
-    analyzer = SentimentAnalyzer()
-    sentiment = analyzer.analyzeSentiment(article)
+    sentiment = sentiment_analyzer.analyzeSentiment(article)
     
     # Should detect neutral sentiment
     assert sentiment.label == "neutral"
@@ -236,14 +216,10 @@ async def test_neutral_sentiment_detection(ticker):
 # Property 37: News Display Completeness
 @pytest.mark.asyncio
 @given(
-    ticker=ticker_strategy()
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
+    ticker=_TICKER
 )
-async def test_news_display_completeness(ticker):
+@settings(FAST)
+async def test_news_display_completeness(sentiment_analyzer, mocked_redis, ticker):
     """
     Property 37: News Display Completeness
     
@@ -259,54 +235,41 @@ async def test_news_display_completeness(ticker):
             headline=f"{ticker} news headline {i}",
             source="Reuters",
             url=f"https://example.com/{i}",
-            published_at=datetime.now() - timedelta(hours=i),
+            published_at=_NOW - timedelta(hours=i),
             summary=f"Summary {i}"
         )
         for i in range(5)
     ]
     
-    mock_mcp_tools = AsyncMock(spec=NewsMCPTools)
-    mock_mcp_tools.get_stock_news.return_value = mock_articles
+    mock_mcp_tools = Mock()
+    mock_mcp_tools.get_stock_news.return_value = _resolved(mock_articles)
     
-    # Mock Redis
-    with patch("app.services.news_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
-        
-        # Create service with sentiment analyzer
-        analyzer = SentimentAnalyzer()
-        service = NewsService(mock_mcp_tools, sentiment_analyzer=analyzer)
-        
-        # Get stock news
-        articles = await service.getStockNews(ticker)
+    # Create service with the shared sentiment analyzer
+    service = NewsService(mock_mcp_tools, sentiment_analyzer=sentiment_analyzer)
+    
+    # Get stock news
+    articles = await service.getStockNews(ticker)
+    
+    # Verify all articles have complete data
+    for article in articles:
+        # Verify required fields
+        assert article.headline is not None and article.headline != ""
+        assert article.source is not None and article.source != ""
+        assert article.published_at is not None
+        assert isinstance(article.published_at, datetime)
         
-        # Verify all articles have complete data
-        for article in articles:
-            # Verify required fields
-            assert article.headline is not None and article.headline != ""
-            assert article.source is not None and article.source != ""
-            assert article.published_at is not None
-            assert isinstance(article.published_at, datetime)
-            
-            # Verify sentiment can be calculated
-            sentiment = analyzer.analyzeSentiment(article)
-            assert sentiment is not None
-            assert sentiment.label in ["positive", "negative", "neutral"]
+        # Verify sentiment can be calculated
+        sentiment = sentiment_analyzer.analyzeSentiment(article)
+        assert sentiment is not None
+        assert sentiment.label in ["positive", "negative", "neutral"]
 
 
 # Property 39: Stock Sentiment Aggregation
-@pytest.mark.asyncio
 @given(
-    ticker=ticker_strategy()
+    ticker=_TICKER
 )
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_stock_sentiment_aggregation(ticker):
+@settings(FAST)
+def test_stock_sentiment_aggregation(sentiment_analyzer, ticker):
     """
     Property 39: Stock Sentiment Aggregation
     
@@ -323,7 +286,7 @@ async def test_stock_sentiment_aggregation(ticker):
             headline=f"{ticker} stock surges on strong earnings",
             source="Reuters",
             url="https://example.com/1",
-            published_at=datetime.now(),
+            published_at=_NOW,
             summary="Record profits and growth"
         ),
         NewsArticle(
@@ -331,7 +294,7 @@ async def test_stock_sentiment_aggregation(ticker):
             headline=f"{ticker} beats expectations with rising revenue",
             source="Bloomberg",
             url="https://example.com/2",
-            published_at=datetime.now(),
+            published_at=_NOW,
             summary="Strong performance continues"
         ),
         NewsArticle(
@@ -339,15 +302,13 @@ async def test_stock_sentiment_aggregation(ticker):
             headline=f"{ticker} faces concerns over declining sales",
             source="CNBC",
             url="https://example.com/3",
-            published_at=datetime.now(),
+            published_at=_NOW,
             summary="Weak performance in key markets"
         )
     ]
     
-    analyzer = SentimentAnalyzer()
-    
     # Get aggregated sentiment
-    stock_sentiment = analyzer.getStockSentiment(ticker, articles)
+    stock_sentiment = sentiment_analyzer.getStockSentiment(ticker, articles)
     
     # Verify structure
     assert isinstance(stock_sentiment, StockSentiment)
@@ -366,25 +327,16 @@ async def test_stock_sentiment_aggregation(ticker):
     assert stock_sentiment.overall_sentiment.score > 0
 
 
-@pytest.mark.asyncio
-@given(
-    ticker=ticker_strategy()
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_stock_sentiment_aggregation_empty(ticker):
+def test_stock_sentiment_aggregation_empty(sentiment_analyzer):
     """
     Test that sentiment aggregation handles empty article list.
     
     Validates: Requirements 11.6
     """
-    analyzer = SentimentAnalyzer()
+    ticker = "AAPL"
     
     # Get sentiment with no articles
-    stock_sentiment = analyzer.getStockSentiment(ticker, [])
+    stock_sentiment = sentiment_analyzer.getStockSentiment(ticker, [])
     
     # Should return neutral sentiment with zero confidence
     assert stock_sentiment.ticker == ticker.upper()
@@ -397,14 +349,10 @@ async def test_stock_sentiment_aggregation_empty(ticker):
 
 @pytest.mark.asyncio
 @given(
-    ticker=ticker_strategy()
+    ticker=_TICKER
 )
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_stock_sentiment_via_news_service(ticker):
+@settings(FAST)
+async def test_stock_sentiment_via_news_service(sentiment_analyzer, mocked_redis, ticker):
     """
     Test that news service integrates sentiment analysis correctly.
     
@@ -417,7 +365,7 @@ async def test_stock_sentiment_via_news_service(ticker):
             headline=f"{ticker} reports strong earnings growth",
             source="Reuters",
             url="https://example.com/1",
-            published_at=datetime.now(),
+            published_at=_NOW,
             summary="Company beats expectations with record profits"
         ),
         NewsArticle(
@@ -425,47 +373,35 @@ async def test_stock_sentiment_via_news_service(ticker):
             headline=f"{ticker} stock rises on positive outlook",
             source="Bloomberg",
             url="https://example.com/2",
-            published_at=datetime.now(),
+            published_at=_NOW,
             summary="Analysts upgrade rating citing strong fundamentals"
         )
     ]
     
-    mock_mcp_tools = AsyncMock(spec=NewsMCPTools)
-    mock_mcp_tools.get_stock_news.return_value = mock_articles
+    mock_mcp_tools = Mock()
+    mock_mcp_tools.get_stock_news.return_value = _resolved(mock_articles)
     
-    # Mock Redis
-    with patch("app.services.news_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
-        
-        # Create service
-        service = NewsService(mock_mcp_tools)
-        
-        # Get stock sentiment
-        stock_sentiment = await service.getStockSentiment(ticker)
-        
-        # Verify sentiment was calculated
-        assert isinstance(stock_sentiment, StockSentiment)
-        assert stock_sentiment.ticker == ticker.upper()
-        assert stock_sentiment.article_count == len(mock_articles)
-        
-        # With positive articles, sentiment should be positive
-        assert stock_sentiment.overall_sentiment.label == "positive"
-        assert stock_sentiment.overall_sentiment.score > 0
+    # Create service with the shared sentiment analyzer
+    service = NewsService(mock_mcp_tools, sentiment_analyzer=sentiment_analyzer)
+    
+    # Get stock sentiment
+    stock_sentiment = await service.getStockSentiment(ticker)
+    
+    # Verify sentiment was calculated
+    assert isinstance(stock_sentiment, StockSentiment)
+    assert stock_sentiment.ticker == ticker.upper()
+    assert stock_sentiment.article_count == len(mock_articles)
+    
+    # With positive articles, sentiment should be positive
+    assert stock_sentiment.overall_sentiment.label == "positive"
+    assert stock_sentiment.overall_sentiment.score > 0
 
 
-@pytest.mark.asyncio
 @given(
-    ticker=ticker_strategy()
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
+    ticker=_TICKER
 )
-async def test_sentiment_confidence_increases_with_keywords(ticker):
+@settings(FAST)
+def test_sentiment_confidence_increases_with_keywords(sentiment_analyzer, ticker):
     """
     Test that confidence increases with more sentiment keywords.
     
@@ -477,7 +413,7 @@ async def test_sentiment_confidence_increases_with_keywords(ticker):
         headline=f"{ticker} stock rises slightly",
         source="Reuters",
         url="https://example.com/1",
-        published_at=datetime.now(),
+        published_at=_NOW,
         summary="Minor increase observed"
     )
     
@@ -487,14 +423,141 @@ async def test_sentiment_confidence_increases_with_keywords(ticker):
         headline=f"{ticker} stock surges with strong gains and record profits",
         source="Reuters",
         url="https://example.com/2",
-        published_at=datetime.now(),
+        published_at=_NOW,
         summary="Company beats expectations with rising revenue and growth"
     )
     
-    analyzer = SentimentAnalyzer()
-    
-    sentiment_low = analyzer.analyzeSentiment(article_low)
-    sentiment_high = analyzer.analyzeSentiment(article_high)
+    sentiment_low = sentiment_analyzer.analyzeSentiment(article_low)
+    sentiment_high = sentiment_analyzer.analyzeSentiment(article_high)
     
     # High keyword article should have higher confidence
     assert sentiment_high.confidence >= sentiment_low.confidence
+
+
+@given(
+    ticker=_TICKER
+)
+@settings(FAST)
+def test_batch_sentiment_matches_per_article(sentiment_analyzer, ticker):
+    """
+    Test that batch sentiment analysis scores each article as analyzeSentiment would.
+    
+    Validates: Requirements 11.2
+    """
+    articles = [
+        NewsArticle(
+            id="batch-positive",
+            headline=f"{ticker} stock surges on strong earnings beat",
+            source="Reuters",
+            url="https://example.com/1",
+            published_at=_NOW,
+            summary="Company reports record profits"
+        ),
+        NewsArticle(
+            id="batch-negative",
+            headline=f"{ticker} stock falls on weak earnings miss",
+            source="Bloomberg",
+            url="https://example.com/2",
+            published_at=_NOW,
+            summary="Company reports losses"
+        ),
+        NewsArticle(
+            id="batch-neutral",
+            headline=f"{ticker} announces new CEO appointment",
+            source="CNBC",
+            url="https://example.com/3",
+            published_at=_NOW,
+            summary="The board has appointed a new chief executive officer"
+        )
+    ]
+    
+    # Score each side against an empty cache, so neither reads the other's results
+    with patch.dict(sentiment_analyzer_module._score_cache, clear=True):
+        sentiments = sentiment_analyzer.analyzeSentimentBatch(articles)
+    with patch.dict(sentiment_analyzer_module._score_cache, clear=True):
+        singles = [sentiment_analyzer.analyzeSentiment(article) for article in articles]
+    
+    # One score per article, in input order
+    assert sentiments == singles
+    assert sentiment_analyzer.analyzeSentimentBatch([]) == []
+
+
+@given(
+    texts=st.lists(
+        st.lists(
+            st.sampled_from(
+                SentimentAnalyzer.POSITIVE_KEYWORDS + SentimentAnalyzer.NEGATIVE_KEYWORDS
+                + ["Surge", "LOSS", "upgrades,", "stock", "\x1e"]
+            ),
+            max_size=6
+        ).map(" ".join),
+        min_size=1,
+        max_size=5
+    )
+)
+@settings(FAST)
+def test_keyword_scores_match_per_text(sentiment_analyzer, texts):
+    """
+    Test that keyword-scoring texts in one joined scan matches scoring each alone.
+    
+    Validates: Requirements 11.2
+    """
+    assert sentiment_analyzer._keyword_scores(texts) == [
+        sentiment_analyzer._keyword_score(text) for text in texts
+    ]
+
+
+def test_repeated_articles_scored_once(score_cache):
+    """
+    Test that an article's text is scored once and reused, even across analyzers.
+    
+    Validates: Requirements 11.2
+    """
+    article = NewsArticle(
+        id="cached-article",
+        headline="Cache check stock surges",
+        source="Reuters",
+        url="https://example.com/1",
+        published_at=_NOW,
+        summary="Record profits"
+    )
+    
+    first = SentimentAnalyzer()
+    second = SentimentAnalyzer()
+    with patch.object(first, "_score_texts", wraps=first._score_texts) as first_spy, \
+            patch.object(second, "_score_texts", wraps=second._score_texts) as second_spy:
+        sentiment = first.analyzeSentiment(article)
+        batch = first.analyzeSentimentBatch([article, article])
+        again = second.analyzeSentiment(article)
+    
+    assert first_spy.call_count == 1
+    assert second_spy.call_count == 0
+    assert batch == [sentiment, sentiment]
+    assert again == sentiment
+
+
+def test_fallback_scores_not_cached_after_inference_failure(score_cache):
+    """
+    Test that keyword scores standing in for a failed FinBERT batch are not cached.
+    
+    Validates: Requirements 11.2
+    """
+    article = NewsArticle(
+        id="fallback-article",
+        headline="Fallback check stock surges",
+        source="Reuters",
+        url="https://example.com/1",
+        published_at=_NOW,
+        summary="Record profits"
+    )
+    
+    analyzer = SentimentAnalyzer()
+    with patch.object(sentiment_analyzer_module, "_model_loaded", True), \
+            patch.object(sentiment_analyzer_module, "_model_load_failed", False), \
+            patch.object(analyzer, "_finbert_score_batch", side_effect=RuntimeError("out of memory")):
+        first = analyzer.analyzeSentiment(article)
+        second = analyzer.analyzeSentiment(article)
+    
+    assert first == second
+    assert first.label == "positive"
+    assert score_cache == {}
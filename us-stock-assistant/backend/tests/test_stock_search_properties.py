@@ -9,8 +9,8 @@ Property 34: Multi-Exchange Search Coverage
 """
 
 import pytest
-from hypothesis import given, strategies as st, settings, HealthCheck
-from unittest.mock import AsyncMock, Mock, patch
+from hypothesis import strategies as st
+from unittest.mock import AsyncMock
 
 from app.services.stock_data_service import StockDataService
 from app.mcp.tools.stock_data import (
@@ -19,27 +19,65 @@ from app.mcp.tools.stock_data import (
 )
 
 
-# Hypothesis strategies for generating test data
-@st.composite
-def search_query_strategy(draw):
-    """Generate valid search queries."""
-    query_type = draw(st.sampled_from(["ticker", "company_name", "partial"]))
-    
-    if query_type == "ticker":
-        # Full ticker symbol
-        return draw(st.text(
-            min_size=1,
-            max_size=5,
-            alphabet=st.characters(whitelist_categories=("Lu",))
-        ))
-    elif query_type == "company_name":
-        # Company name
-        return draw(st.text(min_size=3, max_size=30, alphabet=st.characters(whitelist_categories=("Lu", "Ll", "Nd", "Zs"))))
-    else:
-        # Partial match
-        return draw(st.text(min_size=1, max_size=10, alphabet=st.characters(whitelist_categories=("Lu", "Ll"))))
+# Fixed search queries covering ticker, company name and partial-match shapes.
+# The mocked MCP tools return canned results whatever the query, so a small
+# fixed set replaces generated queries.
+_QUERIES = ["AAPL", "apple", "msft", "a", "Tech"]
+
+# searchStocks only caches queries of three or more characters
+_CACHEABLE_QUERIES = [query for query in _QUERIES if len(query) >= 3]
 
 
+# Canned MCP search results, built once. Tests pass the service a list copy,
+# since searchStocks returns what the tools return.
+_APPLE_RESULTS = (
+    StockSearchResult(
+        ticker="AAPL",
+        company_name="Apple Inc.",
+        exchange="NASDAQ",
+        relevance_score=1.0
+    ),
+)
+_COMPLETENESS_RESULTS = _APPLE_RESULTS + (
+    StockSearchResult(
+        ticker="MSFT",
+        company_name="Microsoft Corporation",
+        exchange="NASDAQ",
+        relevance_score=0.8
+    ),
+)
+_EXCHANGE_RESULTS = (
+    StockSearchResult(
+        ticker="NYSE1",
+        company_name="NYSE Company",
+        exchange="NYSE",
+        relevance_score=0.9
+    ),
+    StockSearchResult(
+        ticker="NSDQ1",
+        company_name="NASDAQ Company",
+        exchange="NASDAQ",
+        relevance_score=0.8
+    ),
+    StockSearchResult(
+        ticker="AMEX1",
+        company_name="AMEX Company",
+        exchange="AMEX",
+        relevance_score=0.7
+    ),
+)
+_LIMIT_RESULTS = tuple(
+    StockSearchResult(
+        ticker=f"TICK{i}",
+        company_name=f"Company {i}",
+        exchange="NYSE",
+        relevance_score=1.0 - (i * 0.05)
+    )
+    for i in range(20)
+)
+
+
+# Hypothesis strategies for generating test data
 @st.composite
 def search_results_strategy(draw, query: str):
     """Generate search results for a query."""
@@ -84,15 +122,22 @@ def search_results_strategy(draw, query: str):
     return results
 
 
+@pytest.fixture(scope="module")
+def search_tools():
+    """Build the spec'd MCP tools mock once; each test sets its own return values."""
+    return AsyncMock(spec=StockDataMCPTools)
+
+
+@pytest.fixture(scope="module")
+def search_service(mocked_redis, search_tools):
+    """Create one stock data service over the shared MCP tools mock."""
+    return StockDataService(search_tools)
+
+
 # Property 31: Stock Search Results Completeness
 @pytest.mark.asyncio
-@given(query=search_query_strategy())
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_stock_search_results_completeness(query):
+@pytest.mark.parametrize("query", _QUERIES)
+async def test_stock_search_results_completeness(search_tools, search_service, query):
     """
     Property 31: Stock Search Results Completeness
     
@@ -101,71 +146,39 @@ async def test_stock_search_results_completeness(query):
     
     Validates: Requirements 8.1
     """
-    # Generate mock search results
-    mock_results = [
-        StockSearchResult(
-            ticker="AAPL",
-            company_name="Apple Inc.",
-            exchange="NASDAQ",
-            relevance_score=1.0
-        ),
-        StockSearchResult(
-            ticker="MSFT",
-            company_name="Microsoft Corporation",
-            exchange="NASDAQ",
-            relevance_score=0.8
-        )
-    ]
-    
     # Mock MCP tools
-    mock_mcp_tools = AsyncMock(spec=StockDataMCPTools)
-    mock_mcp_tools.search_stocks.return_value = mock_results
-    
-    # Mock Redis
-    with patch("app.services.stock_data_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None  # Cache miss
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
-        
-        # Create service
-        service = StockDataService(mock_mcp_tools)
+    search_tools.search_stocks.return_value = list(_COMPLETENESS_RESULTS)
+    
+    # Search stocks
+    results = await search_service.searchStocks(query)
+    
+    # Verify results structure
+    assert isinstance(results, list)
+    
+    # Verify each result has required fields
+    for result in results:
+        assert isinstance(result, StockSearchResult)
         
-        # Search stocks
-        results = await service.searchStocks(query)
+        # Verify ticker is present and non-empty
+        assert hasattr(result, 'ticker')
+        assert result.ticker is not None
+        assert len(result.ticker) > 0
         
-        # Verify results structure
-        assert isinstance(results, list)
+        # Verify company_name is present and non-empty
+        assert hasattr(result, 'company_name')
+        assert result.company_name is not None
+        assert len(result.company_name) > 0
         
-        # Verify each result has required fields
-        for result in results:
-            assert isinstance(result, StockSearchResult)
-            
-            # Verify ticker is present and non-empty
-            assert hasattr(result, 'ticker')
-            assert result.ticker is not None
-            assert len(result.ticker) > 0
-            
-            # Verify company_name is present and non-empty
-            assert hasattr(result, 'company_name')
-            assert result.company_name is not None
-            assert len(result.company_name) > 0
-            
-            # Verify exchange is present and non-empty
-            assert hasattr(result, 'exchange')
-            assert result.exchange is not None
-            assert len(result.exchange) > 0
+        # Verify exchange is present and non-empty
+        assert hasattr(result, 'exchange')
+        assert result.exchange is not None
+        assert len(result.exchange) > 0
 
 
 # Property 32: Search Relevance Ranking
 @pytest.mark.asyncio
-@given(query=search_query_strategy())
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_search_relevance_ranking(query):
+@pytest.mark.parametrize("query", _QUERIES)
+async def test_search_relevance_ranking(search_tools, search_service, query):
     """
     Property 32: Search Relevance Ranking
     
@@ -197,49 +210,33 @@ async def test_search_relevance_ranking(query):
     ]
     
     # Mock MCP tools (already sorted by relevance)
-    mock_mcp_tools = AsyncMock(spec=StockDataMCPTools)
-    mock_mcp_tools.search_stocks.return_value = mock_results
-    
-    # Mock Redis
-    with patch("app.services.stock_data_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None  # Cache miss
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
-        
-        # Create service
-        service = StockDataService(mock_mcp_tools)
+    search_tools.search_stocks.return_value = mock_results
+    
+    # Search stocks
+    results = await search_service.searchStocks(query)
+    
+    # Verify results are ordered by relevance score (descending)
+    if len(results) > 1:
+        relevance_scores = [result.relevance_score for result in results]
         
-        # Search stocks
-        results = await service.searchStocks(query)
+        # Check that scores are in descending order
+        for i in range(len(relevance_scores) - 1):
+            assert relevance_scores[i] >= relevance_scores[i + 1], \
+                f"Results not sorted by relevance: {relevance_scores}"
         
-        # Verify results are ordered by relevance score (descending)
-        if len(results) > 1:
-            relevance_scores = [result.relevance_score for result in results]
-            
-            # Check that scores are in descending order
-            for i in range(len(relevance_scores) - 1):
-                assert relevance_scores[i] >= relevance_scores[i + 1], \
-                    f"Results not sorted by relevance: {relevance_scores}"
-            
-            # Verify exact matches (score = 1.0) come first
-            exact_matches = [r for r in results if r.relevance_score == 1.0]
-            if exact_matches:
-                # All exact matches should be at the beginning
-                for i, result in enumerate(results[:len(exact_matches)]):
-                    assert result.relevance_score == 1.0, \
-                        "Exact matches should be ranked first"
+        # Verify exact matches (score = 1.0) come first
+        exact_matches = [r for r in results if r.relevance_score == 1.0]
+        if exact_matches:
+            # All exact matches should be at the beginning
+            for i, result in enumerate(results[:len(exact_matches)]):
+                assert result.relevance_score == 1.0, \
+                    "Exact matches should be ranked first"
 
 
 # Property 33: Search Result Selection (Service Layer)
 @pytest.mark.asyncio
-@given(query=search_query_strategy())
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_search_result_selection_data_availability(query):
+@pytest.mark.parametrize("query", _QUERIES)
+async def test_search_result_selection_data_availability(search_tools, search_service, query):
     """
     Property 33: Search Result Selection (Service Layer)
     
@@ -253,16 +250,6 @@ async def test_search_result_selection_data_availability(query):
     """
     from app.mcp.tools.stock_data import StockPrice, CompanyInfo
     
-    # Generate mock search results
-    mock_results = [
-        StockSearchResult(
-            ticker="AAPL",
-            company_name="Apple Inc.",
-            exchange="NASDAQ",
-            relevance_score=1.0
-        )
-    ]
-    
     # Mock detailed stock data
     mock_price = StockPrice(
         ticker="AAPL",
@@ -283,58 +270,42 @@ async def test_search_result_selection_data_availability(query):
     )
     
     # Mock MCP tools
-    mock_mcp_tools = AsyncMock(spec=StockDataMCPTools)
-    mock_mcp_tools.search_stocks.return_value = mock_results
-    mock_mcp_tools.get_stock_price.return_value = mock_price
-    mock_mcp_tools.get_company_info.return_value = mock_company_info
-    
-    # Mock Redis
-    with patch("app.services.stock_data_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None  # Cache miss
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
+    search_tools.search_stocks.return_value = list(_APPLE_RESULTS)
+    search_tools.get_stock_price.return_value = mock_price
+    search_tools.get_company_info.return_value = mock_company_info
+    
+    # Search stocks
+    results = await search_service.searchStocks(query)
+    
+    if results:
+        # Select first result
+        selected = results[0]
         
-        # Create service
-        service = StockDataService(mock_mcp_tools)
+        # Verify we can get detailed information for the selected stock
+        price_data = await search_service.getCurrentPrice(selected.ticker)
+        company_data = await search_service.getCompanyInfo(selected.ticker)
         
-        # Search stocks
-        results = await service.searchStocks(query)
+        # Verify price data completeness
+        assert price_data.ticker == selected.ticker
+        assert hasattr(price_data, 'price')
+        assert hasattr(price_data, 'change')
+        assert hasattr(price_data, 'change_percent')
+        assert hasattr(price_data, 'volume')
+        assert hasattr(price_data, 'timestamp')
         
-        if results:
-            # Select first result
-            selected = results[0]
-            
-            # Verify we can get detailed information for the selected stock
-            price_data = await service.getCurrentPrice(selected.ticker)
-            company_data = await service.getCompanyInfo(selected.ticker)
-            
-            # Verify price data completeness
-            assert price_data.ticker == selected.ticker
-            assert hasattr(price_data, 'price')
-            assert hasattr(price_data, 'change')
-            assert hasattr(price_data, 'change_percent')
-            assert hasattr(price_data, 'volume')
-            assert hasattr(price_data, 'timestamp')
-            
-            # Verify company info completeness
-            assert company_data.ticker == selected.ticker
-            assert hasattr(company_data, 'name')
-            assert hasattr(company_data, 'sector')
-            assert hasattr(company_data, 'industry')
-            assert hasattr(company_data, 'market_cap')
-            assert hasattr(company_data, 'description')
+        # Verify company info completeness
+        assert company_data.ticker == selected.ticker
+        assert hasattr(company_data, 'name')
+        assert hasattr(company_data, 'sector')
+        assert hasattr(company_data, 'industry')
+        assert hasattr(company_data, 'market_cap')
+        assert hasattr(company_data, 'description')
 
 
 # Property 34: Multi-Exchange Search Coverage
 @pytest.mark.asyncio
-@given(query=search_query_strategy())
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_multi_exchange_search_coverage(query):
+@pytest.mark.parametrize("query", _QUERIES)
+async def test_multi_exchange_search_coverage(search_tools, search_service, query):
     """
     Property 34: Multi-Exchange Search Coverage
     
@@ -343,154 +314,69 @@ async def test_multi_exchange_search_coverage(query):
     
     Validates: Requirements 8.5
     """
-    # Generate mock search results from multiple exchanges
-    mock_results = [
-        StockSearchResult(
-            ticker="NYSE1",
-            company_name="NYSE Company",
-            exchange="NYSE",
-            relevance_score=0.9
-        ),
-        StockSearchResult(
-            ticker="NSDQ1",
-            company_name="NASDAQ Company",
-            exchange="NASDAQ",
-            relevance_score=0.8
-        ),
-        StockSearchResult(
-            ticker="AMEX1",
-            company_name="AMEX Company",
-            exchange="AMEX",
-            relevance_score=0.7
-        )
-    ]
+    # Mock MCP tools with results from multiple exchanges
+    search_tools.search_stocks.return_value = list(_EXCHANGE_RESULTS)
     
-    # Mock MCP tools
-    mock_mcp_tools = AsyncMock(spec=StockDataMCPTools)
-    mock_mcp_tools.search_stocks.return_value = mock_results
-    
-    # Mock Redis
-    with patch("app.services.stock_data_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None  # Cache miss
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
-        
-        # Create service
-        service = StockDataService(mock_mcp_tools)
+    # Search stocks
+    results = await search_service.searchStocks(query)
+    
+    # Verify results can include multiple exchanges
+    if results:
+        exchanges = set(result.exchange for result in results)
         
-        # Search stocks
-        results = await service.searchStocks(query)
+        # Verify exchanges are from major US exchanges
+        valid_exchanges = {"NYSE", "NASDAQ", "AMEX"}
+        for exchange in exchanges:
+            assert exchange in valid_exchanges, \
+                f"Exchange {exchange} is not a major US exchange"
         
-        # Verify results can include multiple exchanges
-        if results:
-            exchanges = set(result.exchange for result in results)
-            
-            # Verify exchanges are from major US exchanges
-            valid_exchanges = {"NYSE", "NASDAQ", "AMEX"}
-            for exchange in exchanges:
-                assert exchange in valid_exchanges, \
-                    f"Exchange {exchange} is not a major US exchange"
-            
-            # Note: We don't require ALL exchanges to be present in every search,
-            # just that the system supports all major exchanges
+        # Note: We don't require ALL exchanges to be present in every search,
+        # just that the system supports all major exchanges
 
 
 @pytest.mark.asyncio
-@given(
-    query=search_query_strategy(),
-    limit=st.integers(min_value=1, max_value=10)
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_search_result_limiting(query, limit):
+@pytest.mark.parametrize("query,limit", list(zip(_QUERIES, [1, 3, 5, 7, 10])))
+async def test_search_result_limiting(search_tools, search_service, query, limit):
     """
     Test that search results can be limited to a specified number.
     
     Validates: Requirements 8.2, 8.3
     """
-    # Generate more results than the limit
-    mock_results = [
-        StockSearchResult(
-            ticker=f"TICK{i}",
-            company_name=f"Company {i}",
-            exchange="NYSE",
-            relevance_score=1.0 - (i * 0.05)
-        )
-        for i in range(20)
-    ]
+    # Mock MCP tools with more results than the limit
+    search_tools.search_stocks.return_value = list(_LIMIT_RESULTS)
     
-    # Mock MCP tools
-    mock_mcp_tools = AsyncMock(spec=StockDataMCPTools)
-    mock_mcp_tools.search_stocks.return_value = mock_results
-    
-    # Mock Redis
-    with patch("app.services.stock_data_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None  # Cache miss
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
-        
-        # Create service
-        service = StockDataService(mock_mcp_tools)
-        
-        # Search stocks with limit
-        results = await service.searchStocks(query, limit=limit)
-        
-        # Verify result count respects limit
-        assert len(results) <= limit, \
-            f"Expected at most {limit} results, got {len(results)}"
-        
-        # Verify results are still sorted by relevance
-        if len(results) > 1:
-            relevance_scores = [result.relevance_score for result in results]
-            for i in range(len(relevance_scores) - 1):
-                assert relevance_scores[i] >= relevance_scores[i + 1]
+    # Search stocks with limit
+    results = await search_service.searchStocks(query, limit=limit)
+    
+    # Verify result count respects limit
+    assert len(results) <= limit, \
+        f"Expected at most {limit} results, got {len(results)}"
+    
+    # Verify results are still sorted by relevance
+    if len(results) > 1:
+        relevance_scores = [result.relevance_score for result in results]
+        for i in range(len(relevance_scores) - 1):
+            assert relevance_scores[i] >= relevance_scores[i + 1]
 
 
 @pytest.mark.asyncio
-@given(query=search_query_strategy())
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture]
-)
-async def test_search_caching(query):
+@pytest.mark.parametrize("query", _CACHEABLE_QUERIES)
+async def test_search_caching(mocked_redis, search_tools, search_service, query):
     """
     Test that search results are properly cached.
     
     Validates: Requirements 8.5, 21.5
     """
-    mock_results = [
-        StockSearchResult(
-            ticker="AAPL",
-            company_name="Apple Inc.",
-            exchange="NASDAQ",
-            relevance_score=1.0
-        )
-    ]
-    
     # Mock MCP tools
-    mock_mcp_tools = AsyncMock(spec=StockDataMCPTools)
-    mock_mcp_tools.search_stocks.return_value = mock_results
-    
-    # Mock Redis
-    with patch("app.services.stock_data_service.get_redis") as mock_redis_factory:
-        mock_redis = Mock()
-        mock_redis.get.return_value = None  # Cache miss
-        mock_redis.setex.return_value = True
-        mock_redis_factory.return_value = mock_redis
-        
-        # Create service
-        service = StockDataService(mock_mcp_tools)
-        
-        # Search stocks
-        results = await service.searchStocks(query)
-        
-        # Verify cache was set with correct TTL (15 minutes = 900 seconds)
-        mock_redis.setex.assert_called_once()
-        call_args = mock_redis.setex.call_args
-        assert call_args[0][1] == 900  # TTL in seconds
+    search_tools.search_stocks.return_value = list(_APPLE_RESULTS)
+    
+    # Clear calls recorded by earlier tests
+    mocked_redis.reset_mock()
+    
+    # Search stocks
+    results = await search_service.searchStocks(query)
+    
+    # Verify cache was set with correct TTL (15 minutes = 900 seconds)
+    mocked_redis.setex.assert_called_once()
+    call_args = mocked_redis.setex.call_args
+    assert call_args[0][1] == 900  # TTL in seconds